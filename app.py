@@ -1,11 +1,18 @@
 import streamlit as st  # Crea la interfaz web (botones, títulos, sliders)
 import pandas as pd     # Manipula los datos en tablas (DataFrames)
 import numpy as np      # Realiza cálculos matemáticos (potencias, promedios)
-import plotly.express as px  # Genera los gráficos interactivos y coloridos
+import plotly.graph_objects as go  # Genera los gráficos interactivos y coloridos
 
-# Cargar el archivo CSS externo
-with open("style.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+# La configuración de página debe ser el primer comando de Streamlit
+st.set_page_config(page_title="Ro's STEM Analytics", layout="wide")
+
+# Cargar el archivo CSS externo (se lee del disco una sola vez)
+@st.cache_data
+def cargar_css():
+    with open("style.css") as f:
+        return f"<style>{f.read()}</style>"
+
+st.markdown(cargar_css(), unsafe_allow_html=True)
 
 # =====================================================
 # 1. DICCIONARIO DE TRADUCCIÓN (Multi-idioma)
@@ -47,6 +54,12 @@ texts = {
     }
 }
 
+# Nombres de país traducidos: el diccionario se arma una vez por idioma
+@st.cache_data
+def nombres_paises(lang):
+    t = texts[lang]
+    return {"EEUU": t["pais_eeuu"], "Brasil": t["pais_brasil"], "Canadá": t["pais_canada"]}
+
 # =====================================================
 # 2. BASE DE DATOS (Cifras Reales Macro)
 # =====================================================
@@ -65,31 +78,61 @@ def obtener_datos_stem():
 # =====================================================
 # 3. PROCESAMIENTO MATEMÁTICO (Interpolación y Proyección)
 # =====================================================
+# Crecimiento proyectado de graduados: +2% anual para 2023, 2024 y 2025
+FACTORES_PROYECCION = 1.02 ** np.arange(1, 4, dtype=np.float32)
+
+@st.cache_data
 def procesar_dataset(df):
-    paises_unicos = df["pais"].unique() 
-    lista_completa = []
-    
-    for pais in paises_unicos: # <--- AQUÍ ESTÁ EL ARREGLO DEL ERROR 'countries'
-        sub_df = df[df["pais"] == pais].set_index("año")
-        años_todos = pd.DataFrame(index=range(1990, 2026)) 
-        sub_df = años_todos.join(sub_df).interpolate(method='linear')
-        
-        ultima_grad = sub_df.loc[2022, "graduados"]
-        for a in range(2023, 2026):
-            sub_df.loc[a, "graduados"] = ultima_grad * (1.02 ** (a - 2022))
-            sub_df.loc[a, "pais"] = pais
-            sub_df.loc[a, "mujeres_pct"] = sub_df.loc[2022, "mujeres_pct"]
-            sub_df.loc[a, "gasto_pbi"] = sub_df.loc[2022, "gasto_pbi"]
-        
-        lista_completa.append(sub_df.reset_index().rename(columns={"index": "año"}))
-        
-    return pd.concat(lista_completa)
+    años_todos = pd.Index(range(1990, 2026), name="año")
+    paises_unicos = df["pais"].unique()
+    metricas = ["graduados", "mujeres_pct", "gasto_pbi"]
+    n_años, n_paises = len(años_todos), len(paises_unicos)
+
+    # Un único bloque NumPy (filas país-año, columnas métricas) que se llena in situ;
+    # float32 alcanza para porcentajes y conteos y reduce a la mitad la memoria
+    valores = np.empty((n_paises * n_años, len(metricas)), dtype=np.float32)
+
+    # Tabla ancha única: una fila por año y una columna por (métrica, país),
+    # con NaN en los años sin dato
+    columnas = pd.MultiIndex.from_product([metricas, paises_unicos])
+    ancho = (df.pivot(index="año", columns="pais", values=metricas)
+               .reindex(index=años_todos, columns=columnas)
+               .to_numpy(dtype=np.float64))
+    años = años_todos.to_numpy()
+
+    # Interpolación lineal con np.interp entre los años conocidos; después del
+    # último dato se repite su valor (2023-2025 quedan igual que 2022)
+    for k in range(ancho.shape[1]):
+        conocidos = ~np.isnan(ancho[:, k])
+        ancho[:, k] = np.interp(años, años[conocidos], ancho[conocidos, k])
+
+    # Proyección 2023-2025: +2% anual en graduados, el resto se mantiene
+    graduados = ancho[:, :n_paises]
+    graduados[años > 2022] = graduados[años == 2022] * FACTORES_PROYECCION[:, None]
+
+    for j in range(len(metricas)):
+        # Recorrer la tabla por columnas deja las filas ordenadas por país y luego por año
+        valores[:, j] = ancho[:, j * n_paises:(j + 1) * n_paises].ravel(order="F")
+
+    return pd.DataFrame({
+        "año": np.tile(años_todos.to_numpy(dtype=np.int16), n_paises),
+        "pais": pd.Categorical(np.repeat(paises_unicos, n_años), categories=paises_unicos),
+        **{col: valores[:, j] for j, col in enumerate(metricas)},
+    })
+
+# Filtros cacheados: la clave ordenada evita recalcular al repetir una selección
+@st.cache_data(max_entries=64)
+def filtrar_datos(paises, año_inicio, año_fin):
+    df = procesar_dataset(obtener_datos_stem())
+    return df[df["pais"].isin(paises) & df["año"].between(año_inicio, año_fin)]
+
+@st.cache_data(max_entries=64)
+def calcular_ranking(paises, año):
+    return filtrar_datos(paises, año, año).sort_values("graduados")
 
 # =====================================================
 # 4. INTERFAZ Y CONFIGURACIÓN VISUAL
 # =====================================================
-st.set_page_config(page_title="Ro's STEM Analytics", layout="wide")
-
 lang = st.sidebar.radio("🌐 Select Language / Idioma", ["ES", "EN"])
 t = texts[lang] 
 
@@ -98,12 +141,13 @@ st.markdown(t["subtitulo"])
 
 df_final = procesar_dataset(obtener_datos_stem())
 
+traducciones = nombres_paises(lang)
+
 def traducir_pais(nombre):
-    traducciones = {"EEUU": t["pais_eeuu"], "Brasil": t["pais_brasil"], "Canadá": t["pais_canada"]}
     return traducciones.get(nombre, nombre)
 
-# Limpiamos valores nulos para que no aparezca 'nan' en el filtro
-opciones_paises = [p for p in df_final["pais"].unique() if pd.notna(p)]
+# Las categorías de 'pais' ya son la lista de países, sin nulos ni recorrer filas
+opciones_paises = list(df_final["pais"].cat.categories)
 
 paises_seleccionados = st.sidebar.multiselect(
     t["paises_sel"], 
@@ -115,34 +159,70 @@ paises_seleccionados = st.sidebar.multiselect(
 rango_años = st.sidebar.slider(t["año_sel"], 1990, 2025, (1990, 2025))
 
 # FILTRO DE DATOS
-df_filtrado = df_final[
-    (df_final["pais"].isin(paises_seleccionados)) & 
-    (df_final["año"].between(rango_años[0], rango_años[1]))
-]
+paises_clave = tuple(sorted(paises_seleccionados))
+df_filtrado = filtrar_datos(paises_clave, *rango_años)
 
 # =====================================================
 # 5. GRÁFICOS (Evolución y Ranking)
 # =====================================================
-if not df_filtrado.empty:
+# Las figuras se cachean por idioma, países y años: volver a una selección
+# anterior reutiliza el gráfico ya construido
+@st.cache_data(max_entries=32)
+def construir_grafico_lineas(lang, paises, año_inicio, año_fin):
+    nombres = nombres_paises(lang)
+    df = filtrar_datos(paises, año_inicio, año_fin)
+
+    # Si hay un solo año, usamos líneas rectas, si hay más, usamos curvas
+    forma_linea = "spline" if año_fin > año_inicio else "linear"
+
+    # Traducimos las categorías (no cada fila) antes de graficar
+    df_plot = df.assign(pais_label=df["pais"].cat.rename_categories(lambda p: nombres.get(p, p)))
+
+    # Trazas armadas directo desde arrays NumPy, una por país
+    fig = go.Figure()
+    for pais, grupo in df_plot.groupby("pais_label", observed=True, sort=False):
+        fig.add_trace(go.Scatter(x=grupo["año"].to_numpy(), y=grupo["graduados"].to_numpy(),
+                                 name=pais,
+                                 mode="lines+markers", # Bolitas para que se vea siempre el dato
+                                 line_shape=forma_linea))
+
+    fig.update_layout(
+        template="plotly_dark",
+        paper_bgcolor='rgba(0,0,0,0)', 
+        plot_bgcolor='rgba(0,0,0,0)',
+        margin=dict(l=0, r=0, t=50, b=0),
+        xaxis_title="año", yaxis_title="graduados", legend_title_text="pais"
+    )
+    return fig
+
+@st.cache_data(max_entries=32)
+def construir_grafico_ranking(lang, paises, año):
+    nombres = nombres_paises(lang)
+    data_ranking = calcular_ranking(paises, año)
+    graduados = data_ranking["graduados"].to_numpy()
+
+    fig = go.Figure(go.Bar(x=graduados, y=[nombres.get(n, n) for n in data_ranking["pais"]],
+                           orientation='h',
+                           marker=dict(color=graduados, colorscale="Agsunset")))
+    
+    fig.update_layout(
+        template="plotly_dark",
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        xaxis_title="graduados", yaxis_title="pais"
+    )
+    return fig
+
+# Los gráficos viven en un fragmento: se redibujan aislados del resto de la
+# página y solo consultan las figuras ya cacheadas
+@st.fragment
+def mostrar_graficos(lang, paises_clave, rango_años):
+    t = texts[lang]
     col_izq, col_der = st.columns([2, 1]) 
 
     with col_izq:
         st.subheader(t["evolucion_titulo"])
-        # Si hay un solo año, usamos líneas rectas, si hay más, usamos curvas
-        forma_linea = "spline" if len(df_filtrado["año"].unique()) > 1 else "linear"
-        
-        fig_line = px.line(df_filtrado, x="año", y="graduados", color="pais", 
-                           line_shape=forma_linea,
-                           markers=True, # Bolitas para que se vea siempre el dato
-                           template="plotly_dark")
-
-        fig_line.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)', 
-            plot_bgcolor='rgba(0,0,0,0)',
-            margin=dict(l=0, r=0, t=50, b=0)
-        )
-        
-        fig_line.for_each_trace(lambda trace: trace.update(name=traducir_pais(trace.name)))
+        fig_line = construir_grafico_lineas(lang, paises_clave, *rango_años)
         st.plotly_chart(fig_line, use_container_width=True)
 
     with col_der:
@@ -150,24 +230,14 @@ if not df_filtrado.empty:
         año_actual = rango_años[1]
         st.subheader(f"{t['ranking_titulo']} {año_actual}")
         
-        data_ranking = df_filtrado[df_filtrado["año"] == año_actual].sort_values("graduados")
-        
-        if not data_ranking.empty:
-            fig_bar = px.bar(data_ranking, x="graduados", y="pais", 
-                             orientation='h', color="graduados", 
-                             color_continuous_scale="Agsunset",
-                             template="plotly_dark")
-            
-            fig_bar.update_layout(
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                coloraxis_showscale=False, 
-                yaxis={'tickmode': 'array', 'tickvals': data_ranking['pais'], 
-                       'ticktext': [traducir_pais(n) for n in data_ranking['pais']]}
-            )
+        if not calcular_ranking(paises_clave, año_actual).empty:
+            fig_bar = construir_grafico_ranking(lang, paises_clave, año_actual)
             st.plotly_chart(fig_bar, use_container_width=True)
         else:
             st.info("No hay datos para este año específico.")
+
+if not df_filtrado.empty:
+    mostrar_graficos(lang, paises_clave, rango_años)
 else:
     st.warning("Selecciona al menos un país para ver los datos.")
 
@@ -178,5 +248,9 @@ st.divider()
 st.subheader(t["fuente_titulo"])
 st.info(f"{t['fuente_texto']} UNESCO Institute for Statistics & World Bank Open Data.")
 
-with st.expander(t["descarga"]):
-    st.dataframe(df_filtrado, use_container_width=True)
\ No newline at end of file
+# El expander serializa la tabla aunque esté cerrado; con el toggle solo se
+# envía cuando el usuario pide verla
+if st.toggle(t["descarga"], value=False):
+    # Graduados se muestra entero solo en la tabla; los datos siguen en float32
+    st.dataframe(df_filtrado.round({"graduados": 0}).astype({"graduados": "int32"}),
+                 use_container_width=True)
\ No newline at end of file